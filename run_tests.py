@@ -6,9 +6,11 @@ import difflib
 import io
 import logging
 import multiprocessing
+import os
 import re
 import shlex
 import sys
+import tempfile
 from coverage import Coverage  # type: ignore
 from pathlib import Path
 from typing import Any, Iterator, List, Optional, Pattern, Tuple
@@ -35,6 +37,7 @@ class TestCase:
     brief_crashes: bool = True
     flags_path: Optional[Path] = None
     flags: List[str] = field(default_factory=list)
+    use_parse_cache: bool = False
 
 
 def set_up_logging(debug: bool) -> None:
@@ -86,9 +89,32 @@ def decompile_and_compare(
     if test_case.flags_path is not None:
         test_flags.extend(get_test_flags(test_case.flags_path))
     test_flags.append(str(test_case.asm_file))
-    options = parse_flags(test_flags)
 
-    final_contents = decompile_and_capture_output(options, test_case.brief_crashes)
+    if test_case.use_parse_cache:
+        # Decompile twice through an empty parse cache, so that both the cold
+        # and the warm run are compared against the expected output.
+        with parse_cache_enabled():
+            outputs = [
+                decompile_and_capture_output(
+                    parse_flags(test_flags), test_case.brief_crashes
+                )
+                for _ in range(2)
+            ]
+        if outputs[0] != outputs[1]:
+            return False, "\n".join(
+                [
+                    f"Output of {test_case.asm_file} differs with a warm parse cache! Diff:",
+                    *difflib.unified_diff(
+                        outputs[0].splitlines(),
+                        outputs[1].splitlines(),
+                        n=test_options.diff_context,
+                    ),
+                ]
+            )
+        final_contents = outputs[0]
+    else:
+        options = parse_flags(test_flags)
+        final_contents = decompile_and_capture_output(options, test_case.brief_crashes)
 
     if test_options.should_overwrite:
         test_case.output_file.parent.mkdir(parents=True, exist_ok=True)
@@ -109,6 +135,24 @@ def decompile_and_compare(
     return True, ""
 
 
+@contextlib.contextmanager
+def parse_cache_enabled() -> Iterator[None]:
+    saved_env = {
+        name: os.environ.get(name) for name in ["MIPS_TO_C_CACHE", "XDG_CACHE_HOME"]
+    }
+    with tempfile.TemporaryDirectory() as cache_home:
+        os.environ["MIPS_TO_C_CACHE"] = "1"
+        os.environ["XDG_CACHE_HOME"] = cache_home
+        try:
+            yield
+        finally:
+            for name, value in saved_env.items():
+                if value is None:
+                    del os.environ[name]
+                else:
+                    os.environ[name] = value
+
+
 def decompile_and_capture_output(options: Options, brief_crashes: bool) -> str:
     # This import is deferred so it can be profiled by the coverage tool
     from src.main import run as decompile
@@ -147,6 +191,7 @@ def create_e2e_tests(
                 brief_crashes=True,
                 flags_path=flags_path,
                 flags=["--function", "test"],
+                use_parse_cache=e2e_test_path.name == "parse-cache",
             )
         )
     cases.sort()
@@ -19,6 +19,7 @@ from .error import DecompFailure
 from .options import Formatter
 from .parse_file import AsmData, Function, Label
 from .parse_instruction import (
+    JUMP_INSTRUCTIONS,
     AsmAddressMode,
     AsmGlobalSymbol,
     AsmLiteral,
@@ -38,6 +39,9 @@ class Block:
     approx_label_name: str
     instructions: List[Instruction]
 
+    # The block's (single) branch or "jr" instruction, if any.
+    jump: Optional[Instruction] = None
+
     # TODO: fix "Any" to be "BlockInfo" (currently annoying due to circular imports)
     block_info: Optional[Any] = None
 
@@ -61,6 +65,7 @@ class BlockBuilder:
     last_label_name: str = "initial"
     label_counter: int = 0
     curr_instructions: List[Instruction] = field(default_factory=list)
+    curr_jump: Optional[Instruction] = None
     blocks: List[Block] = field(default_factory=list)
 
     def new_block(self) -> Optional[Block]:
@@ -71,7 +76,11 @@ class BlockBuilder:
         if self.label_counter > 0:
             label_name += f".{self.label_counter}"
         block = Block(
-            self.curr_index, self.curr_label, label_name, self.curr_instructions
+            self.curr_index,
+            self.curr_label,
+            label_name,
+            self.curr_instructions,
+            jump=self.curr_jump,
         )
         self.blocks.append(block)
 
@@ -79,10 +88,14 @@ class BlockBuilder:
         self.curr_label = None
         self.label_counter += 1
         self.curr_instructions = []
+        self.curr_jump = None
 
         return block
 
     def add_instruction(self, instruction: Instruction) -> None:
+        if instruction.mnemonic in JUMP_INSTRUCTIONS:
+            assert self.curr_jump is None, "too many jump instructions in one block"
+            self.curr_jump = instruction
         self.curr_instructions.append(instruction)
 
     def set_label(self, label: Label) -> None:
@@ -711,16 +724,14 @@ def build_blocks(function: Function, asm_data: AsmData) -> List[Block]:
             branch_not = Instruction.derived(
                 mn_inverted, item.args[:-1] + [temp_label], item
             )
-            nop = Instruction.derived("nop", [], item)
             block_builder.add_instruction(branch_not)
-            block_builder.add_instruction(nop)
             block_builder.new_block()
             block_builder.add_instruction(next_item)
             block_builder.add_instruction(Instruction.derived("b", [target], item))
-            block_builder.add_instruction(nop)
             block_builder.new_block()
+            # The skip block needs an instruction to carry its label.
             block_builder.set_label(Label(temp_label.target))
-            block_builder.add_instruction(nop)
+            block_builder.add_instruction(Instruction.derived("nop", [], item))
 
         elif item.mnemonic in ["jal", "jalr"]:
             # Move the delay slot instruction to before the call so it
@@ -731,11 +742,15 @@ def build_blocks(function: Function, asm_data: AsmData) -> List[Block]:
                     "register, which is currently not supported.\n\n"
                     "Try rewriting the assembly to avoid that."
                 )
-            block_builder.add_instruction(next_item)
+            # A nop in a delay slot does nothing, so leave it out of the
+            # block. (The block still contains the jump or call itself.)
+            if next_item.mnemonic != "nop":
+                block_builder.add_instruction(next_item)
             block_builder.add_instruction(item)
         else:
             block_builder.add_instruction(item)
-            block_builder.add_instruction(next_item)
+            if next_item.mnemonic != "nop":
+                block_builder.add_instruction(next_item)
 
         if item.is_jump_instruction():
             # Split blocks at jumps, after the next instruction.
@@ -754,8 +769,7 @@ def build_blocks(function: Function, asm_data: AsmData) -> List[Block]:
         label = block_builder.curr_label.name
         print(f'Warning: missing "jr $ra" in last block (.{label}).\n')
         meta = InstructionMeta.missing()
-        block_builder.add_instruction(Instruction("jr", [Register("ra")], meta))
-        block_builder.add_instruction(Instruction("nop", [], meta))
+        block_builder.add_instruction(Instruction("jr", [Register.get("ra")], meta))
         block_builder.new_block()
 
     # Throw away whatever is past the last "jr $ra" and return what we have.
@@ -769,7 +783,6 @@ class _BaseNode:
     block: Block
     emit_goto: bool
     parents: List["Node"] = field(init=False, default_factory=list)
-    dominators: Set["Node"] = field(init=False, default_factory=set)
     immediate_dominator: Optional["Node"] = field(init=False, default=None)
     immediately_dominates: List["Node"] = field(init=False, default_factory=list)
     postdominators: Set["Node"] = field(init=False, default_factory=set)
@@ -922,145 +935,150 @@ class NaturalLoop:
     backedges: Set[Node] = field(default_factory=set)
 
 
-def build_graph_from_block(
-    block: Block, blocks: List[Block], nodes: List[Node], asm_data: AsmData
-) -> Node:
-    # Don't reanalyze blocks.
-    for node in nodes:
-        if node.block == block:
-            return node
-
-    new_node: Node
+def build_node_for_block(
+    block: Block,
+    blocks: List[Block],
+    blocks_by_label: Dict[str, Block],
+    terminal_node: TerminalNode,
+    asm_data: AsmData,
+) -> Tuple[Node, List[Block]]:
+    """Create the node for a block, with its outgoing edges left unset, and
+    return it together with the blocks that those edges lead to (in order)."""
     dummy_node: Any = None
+
+    jump = block.jump
+    if jump is None:
+        # No jumps, i.e. the next block is this node's successor block.
+        next_block = blocks[block.index + 1]
+        return BasicNode(block, False, dummy_node), [next_block]
+
+    # There is a jump. This is either:
+    # - a ReturnNode, if it's "jr $ra",
+    # - a SwitchNode, if it's "jr $something_else",
+    # - a BasicNode, if it's an unconditional branch, or
+    # - a ConditionalNode.
+    if jump.mnemonic == "jr" and jump.args[0] == Register.get("ra"):
+        return ReturnNode(block, False, index=0, terminal=terminal_node), []
+
+    if jump.mnemonic == "jr":
+        jtbl_names = []
+        for ins in block.instructions:
+            for arg in ins.args:
+                if (
+                    isinstance(arg, AsmAddressMode)
+                    and isinstance(arg.lhs, Macro)
+                    and arg.lhs.macro_name == "lo"
+                    and isinstance(arg.lhs.argument, AsmGlobalSymbol)
+                    and any(
+                        arg.lhs.argument.symbol_name.startswith(prefix)
+                        for prefix in ("jtbl", "jpt_")
+                    )
+                ):
+                    jtbl_names.append(arg.lhs.argument.symbol_name)
+        if len(jtbl_names) != 1:
+            raise DecompFailure(
+                f"Unable to determine jump table for jr instruction {jump.meta.loc_str()}.\n\n"
+                "There must be a read of a variable in the same block as\n"
+                'the instruction, which has a name starting with "jtbl"/"jpt_".'
+            )
+
+        jtbl_name = jtbl_names[0]
+        if jtbl_name not in asm_data.values:
+            raise DecompFailure(
+                f"Found jr instruction {jump.meta.loc_str()}, but the "
+                "corresponding jump table is not provided.\n"
+                "\n"
+                "Please include it in the input .s file(s), or in an additional file.\n"
+                'It needs to be within ".section .rodata" or ".section .late_rodata".\n'
+                "\n"
+                "(You might need to pass --goto and --no-andor flags as well, "
+                "to get correct control flow for non-jtbl switch jumps.)"
+            )
+
+        case_blocks = []
+        jtbl_entries = asm_data.values[jtbl_name].data
+        for entry in jtbl_entries:
+            if isinstance(entry, bytes):
+                # We have entered padding, stop reading.
+                break
+            entry = entry.lstrip(".")
+            case_block = blocks_by_label.get(entry)
+            if case_block is None:
+                raise DecompFailure(f"Cannot find jtbl target {entry}")
+            case_blocks.append(case_block)
+        return SwitchNode(block, False, []), case_blocks
+
+    assert jump.is_branch_instruction()
+
+    # Get the block associated with the jump target.
+    branch_label = jump.get_branch_target()
+    branch_block = blocks_by_label.get(branch_label.target)
+    if branch_block is None:
+        target = branch_label.target
+        raise DecompFailure(f"Cannot find branch target {target}")
+
+    is_constant_branch = jump.mnemonic in ["b", "j"]
+    emit_goto = jump.meta.emit_goto
+    if is_constant_branch:
+        # A constant branch becomes a basic edge to our branch target.
+        return BasicNode(block, emit_goto, dummy_node), [branch_block]
+
+    # A conditional branch means the fallthrough block is the next
+    # block if the branch isn't.
+    next_block = blocks[block.index + 1]
+    new_node = ConditionalNode(block, emit_goto, dummy_node, dummy_node)
+    return new_node, [branch_block, next_block]
+
+
+def build_graph_from_block(
+    entry_block: Block,
+    blocks: List[Block],
+    blocks_by_label: Dict[str, Block],
+    nodes: List[Node],
+    asm_data: AsmData,
+) -> None:
+    """Create nodes for all blocks reachable from entry_block, appending them
+    to nodes in depth-first preorder, and link them together.
+
+    This uses an explicit stack rather than recursion, so that long chains
+    of blocks don't run into Python's recursion limit."""
     terminal_node = nodes[0]
     assert isinstance(
         terminal_node, TerminalNode
     ), "expected first node to be TerminalNode"
 
-    def find_block_by_label(label: str) -> Optional[Block]:
-        for block in blocks:
-            if block.label and block.label.name == label:
-                return block
-        return None
-
-    # Extract branching instructions from this block.
-    jumps: List[Instruction] = [
-        inst for inst in block.instructions if inst.is_jump_instruction()
-    ]
-    assert len(jumps) in [0, 1], "too many jump instructions in one block"
-
-    if len(jumps) == 0:
-        # No jumps, i.e. the next block is this node's successor block.
-        new_node = BasicNode(block, False, dummy_node)
+    nodes_by_block_index: Dict[int, Node] = {}
+    successors: List[Tuple[Node, List[Block]]] = []
+    stack: List[Block] = [entry_block]
+    while stack:
+        block = stack.pop()
+        # Don't reanalyze blocks.
+        if block.index in nodes_by_block_index:
+            continue
+        new_node, successor_blocks = build_node_for_block(
+            block, blocks, blocks_by_label, terminal_node, asm_data
+        )
         nodes.append(new_node)
+        nodes_by_block_index[block.index] = new_node
+        successors.append((new_node, successor_blocks))
+        stack.extend(reversed(successor_blocks))
 
-        # Recursively analyze.
-        next_block = blocks[block.index + 1]
-        new_node.successor = build_graph_from_block(next_block, blocks, nodes, asm_data)
-    elif len(jumps) == 1:
-        # There is a jump. This is either:
-        # - a ReturnNode, if it's "jr $ra",
-        # - a SwitchNode, if it's "jr $something_else",
-        # - a BasicNode, if it's an unconditional branch, or
-        # - a ConditionalNode.
-        jump = jumps[0]
-
-        if jump.mnemonic == "jr" and jump.args[0] == Register("ra"):
-            new_node = ReturnNode(block, False, index=0, terminal=terminal_node)
-            nodes.append(new_node)
-            return new_node
-
-        if jump.mnemonic == "jr":
-            new_node = SwitchNode(block, False, [])
-            nodes.append(new_node)
-
-            jtbl_names = []
-            for ins in block.instructions:
-                for arg in ins.args:
-                    if (
-                        isinstance(arg, AsmAddressMode)
-                        and isinstance(arg.lhs, Macro)
-                        and arg.lhs.macro_name == "lo"
-                        and isinstance(arg.lhs.argument, AsmGlobalSymbol)
-                        and any(
-                            arg.lhs.argument.symbol_name.startswith(prefix)
-                            for prefix in ("jtbl", "jpt_")
-                        )
-                    ):
-                        jtbl_names.append(arg.lhs.argument.symbol_name)
-            if len(jtbl_names) != 1:
-                raise DecompFailure(
-                    f"Unable to determine jump table for jr instruction {jump.meta.loc_str()}.\n\n"
-                    "There must be a read of a variable in the same block as\n"
-                    'the instruction, which has a name starting with "jtbl"/"jpt_".'
-                )
-
-            jtbl_name = jtbl_names[0]
-            if jtbl_name not in asm_data.values:
-                raise DecompFailure(
-                    f"Found jr instruction {jump.meta.loc_str()}, but the "
-                    "corresponding jump table is not provided.\n"
-                    "\n"
-                    "Please include it in the input .s file(s), or in an additional file.\n"
-                    'It needs to be within ".section .rodata" or ".section .late_rodata".\n'
-                    "\n"
-                    "(You might need to pass --goto and --no-andor flags as well, "
-                    "to get correct control flow for non-jtbl switch jumps.)"
-                )
-
-            jtbl_entries = asm_data.values[jtbl_name].data
-            for entry in jtbl_entries:
-                if isinstance(entry, bytes):
-                    # We have entered padding, stop reading.
-                    break
-                entry = entry.lstrip(".")
-                case_block = find_block_by_label(entry)
-                if case_block is None:
-                    raise DecompFailure(f"Cannot find jtbl target {entry}")
-                case_node = build_graph_from_block(case_block, blocks, nodes, asm_data)
-                new_node.cases.append(case_node)
-            return new_node
-
-        assert jump.is_branch_instruction()
-
-        # Get the block associated with the jump target.
-        branch_label = jump.get_branch_target()
-        branch_block = find_block_by_label(branch_label.target)
-        if branch_block is None:
-            target = branch_label.target
-            raise DecompFailure(f"Cannot find branch target {target}")
-
-        is_constant_branch = jump.mnemonic in ["b", "j"]
-        emit_goto = jump.meta.emit_goto
-        if is_constant_branch:
-            # A constant branch becomes a basic edge to our branch target.
-            new_node = BasicNode(block, emit_goto, dummy_node)
-            nodes.append(new_node)
-            # Recursively analyze.
-            new_node.successor = build_graph_from_block(
-                branch_block, blocks, nodes, asm_data
-            )
-        else:
-            # A conditional branch means the fallthrough block is the next
-            # block if the branch isn't.
-            new_node = ConditionalNode(block, emit_goto, dummy_node, dummy_node)
-            nodes.append(new_node)
-            # Recursively analyze this too.
-            next_block = blocks[block.index + 1]
-            new_node.conditional_edge = build_graph_from_block(
-                branch_block, blocks, nodes, asm_data
-            )
-            new_node.fallthrough_edge = build_graph_from_block(
-                next_block, blocks, nodes, asm_data
-            )
-    return new_node
+    # Now that every reachable block has a node, fill in the edges.
+    for node, successor_blocks in successors:
+        successor_nodes = [nodes_by_block_index[b.index] for b in successor_blocks]
+        if isinstance(node, BasicNode):
+            (node.successor,) = successor_nodes
+        elif isinstance(node, ConditionalNode):
+            node.conditional_edge, node.fallthrough_edge = successor_nodes
+        elif isinstance(node, SwitchNode):
+            node.cases = successor_nodes
 
 
 def is_trivial_return_block(block: Block) -> bool:
     # A heuristic for when a block is a simple "early-return" block.
     # This could be improved.
     stores = ["sb", "sh", "sw", "swc1", "sdc1", "swr", "swl", "jal"]
-    return_regs = [Register("v0"), Register("f0")]
+    return_regs = [Register.get("v0"), Register.get("f0")]
     for instr in block.instructions:
         if instr.mnemonic in stores:
             return False
@@ -1095,17 +1113,27 @@ def build_nodes(
             f"Function {function.name} contains no instructions. Maybe it is rodata?"
         )
 
+    # Labels are unique within a function, but if one were to be repeated,
+    # branches to it should resolve to its first occurrence.
+    blocks_by_label: Dict[str, Block] = {}
+    for block in blocks:
+        if block.label is not None:
+            blocks_by_label.setdefault(block.label.name, block)
+
     # Traverse through the block tree.
     entry_block = blocks[0]
-    build_graph_from_block(entry_block, blocks, graph, asm_data)
+    build_graph_from_block(entry_block, blocks, blocks_by_label, graph, asm_data)
 
     # Give the TerminalNode a new index so that it sorts to the end of the list
     assert [n for n in graph if isinstance(n, TerminalNode)] == [terminal_node]
     terminal_node.block.index = max(n.block.index for n in graph) + 1
 
-    # Sort the nodes by index.
-    graph.sort(key=lambda node: node.block.index)
-    return graph
+    # Sort the nodes by index. Each reachable block has exactly one node, so
+    # this can be done by placing each node at its index.
+    nodes_by_index: List[Optional[Node]] = [None] * (terminal_node.block.index + 1)
+    for node in graph:
+        nodes_by_index[node.block.index] = node
+    return [node for node in nodes_by_index if node is not None]
 
 
 def is_premature_return(node: Node, edge: Node, nodes: List[Node]) -> bool:
@@ -1156,15 +1184,25 @@ def duplicate_premature_returns(nodes: List[Node]) -> List[Node]:
             node.successor = n
             extra_nodes.append(n)
 
-    # Filter nodes to only include ones reachable from the entry node
-    queue = {nodes[0]}
-    # Always include the TerminalNode (even if it isn't reachable right now)
-    reachable_nodes: Set[Node] = {n for n in nodes if isinstance(n, TerminalNode)}
-    while queue:
-        node = queue.pop()
+    # Filter nodes to only include ones reachable from the entry node.
+    # Rewiring a premature return can leave the original ReturnNode dead.
+    reachable_nodes: Set[Node] = set()
+    stack: List[Node] = [nodes[0]]
+    while stack:
+        node = stack.pop()
+        if node in reachable_nodes:
+            continue
         reachable_nodes.add(node)
-        queue.update(set(node.children()) - reachable_nodes)
-    nodes = sorted(reachable_nodes, key=lambda node: node.block.index)
+        stack.extend(node.children())
+
+    # Always include the TerminalNode (even if it isn't reachable right now).
+    # The sort is stable, so duplicated return nodes stay in creation order.
+    nodes = [
+        n
+        for n in nodes + extra_nodes
+        if n in reachable_nodes or isinstance(n, TerminalNode)
+    ]
+    nodes.sort(key=lambda node: node.block.index)
     return nodes
 
 
@@ -1241,11 +1279,14 @@ def compute_relations(nodes: List[Node]) -> None:
     terminal = nodes[-1]
     assert isinstance(terminal, TerminalNode)
 
-    # Compute dominators & immediate dominators
+    # Compute dominators & immediate dominators. Only the immediate dominators
+    # are kept on the nodes; the full sets, which are quadratic in total size,
+    # are needed just for finding backedges below.
+    dominator_sets: Dict[Node, Set[Node]] = {n: set() for n in nodes}
     compute_dominators(
         entry=entry,
         parents=lambda n: n.parents,
-        dominators=lambda n: n.dominators,
+        dominators=lambda n: dominator_sets[n],
         immediately_dominates=lambda n: n.immediately_dominates,
         set_immediate_dominator=_set_immediate_dominator,
     )
@@ -1263,7 +1304,7 @@ def compute_relations(nodes: List[Node]) -> None:
     # Iterate over all edges n -> c and check for backedges, which define natural loops
     for node in nodes:
         for child in node.children():
-            if child not in node.dominators:
+            if child not in dominator_sets[node]:
                 continue
             # Found a backedge node -> child where child dominates node; child is the "head" of the loop
             if child.loop is None:
@@ -1,7 +1,10 @@
 import argparse
+import hashlib
+import io
+import os
+import pickle
 import re
 import sys
-import traceback
 from pathlib import Path
 from typing import Dict, List, Optional, Union
 
@@ -10,7 +13,13 @@ from .error import DecompFailure
 from .flow_graph import visualize_flowgraph
 from .if_statements import get_function_text
 from .options import CodingStyle, Options
-from .parse_file import AsmData, Function, parse_file
+from .parse_file import (
+    AsmData,
+    Function,
+    MIPSFile,
+    assume_macro_unset,
+    parse_file,
+)
 from .translate import (
     FunctionInfo,
     GlobalInfo,
@@ -25,6 +34,8 @@ def print_exception(sanitize: bool) -> None:
     If `sanitize` is true, the filename's full path is stripped,
     and the line is set to 0. These changes make the test output
     less brittle."""
+    import traceback
+
     if sanitize:
         tb = traceback.TracebackException(*sys.exc_info())
         if tb.exc_type == InstrProcessingFailure and tb.__cause__:
@@ -38,6 +49,82 @@ def print_exception(sanitize: bool) -> None:
         traceback.print_exc(file=sys.stdout)
 
 
+def parse_cache_dir() -> Path:
+    """Return the per-user directory that parsed files are cached in."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "mips_to_c"
+
+
+def parse_file_cached(filename: str, options: Options) -> MIPSFile:
+    """Parse an asm file. If the environment variable MIPS_TO_C_CACHE is set
+    to 1, the parsed file is pickled into the user's cache directory (see
+    `parse_cache_dir`) and reused when the same input is parsed again.
+
+    Cache entries are keyed on the file contents together with everything
+    else parsing depends on: the file name (which ends up in instruction
+    metadata), the preprocessor defines, the goto patterns, and the source
+    of the parser itself, so that entries go stale when it changes. Parsing
+    can also add to the preprocessor defines (for .ifdef of an unknown
+    macro); those additions are stored with the entry and replayed on a hit."""
+    # Read and decode the file in one go, rather than line by line through a
+    # text-mode file object. (StringIO's newline=None gives the same universal
+    # newline handling as text mode.)
+    with open(filename, "rb") as f:
+        data = f.read()
+
+    defines = options.preproc_defines
+    cache_path: Optional[Path] = None
+    if os.environ.get("MIPS_TO_C_CACHE") == "1":
+        key = hashlib.sha256()
+        src_dir = Path(__file__).parent
+        for path in [src_dir / "parse_file.py", src_dir / "parse_instruction.py"]:
+            key.update(path.read_bytes())
+        settings = (
+            Path(filename).name,
+            sorted(defines.items()),
+            options.goto_patterns,
+        )
+        key.update(repr(settings).encode("utf-8"))
+        key.update(data)
+
+        try:
+            cache_path = parse_cache_dir() / f"{key.hexdigest()}.pickle"
+            with open(cache_path, "rb") as cache_file:
+                cached_file, cached_macros = pickle.load(cache_file)
+            if isinstance(cached_file, MIPSFile):
+                for macro_name in cached_macros:
+                    assume_macro_unset(defines, macro_name)
+                return cached_file
+        except Exception:
+            # A missing or unreadable entry, or no usable cache directory,
+            # just means we parse the file again.
+            pass
+
+    known_macros = set(defines)
+    text = io.StringIO(data.decode("utf-8-sig"), newline=None)
+    mips_file = parse_file(text, options, filename=filename)
+
+    if cache_path is not None:
+        unset_macros = [name for name in defines if name not in known_macros]
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        try:
+            cache_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            with open(tmp_path, "wb") as cache_file:
+                pickle.dump(
+                    (mips_file, unset_macros),
+                    cache_file,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(tmp_path, cache_path)
+        except Exception:
+            # Caching is best-effort, but don't leave a partial entry behind.
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+    return mips_file
+
+
 def run(options: Options) -> int:
     all_functions: Dict[str, Function] = {}
     asm_data = AsmData()
@@ -47,8 +134,7 @@ def run(options: Options) -> int:
             if filename == "-":
                 mips_file = parse_file(sys.stdin, options)
             else:
-                with open(filename, "r", encoding="utf-8-sig") as f:
-                    mips_file = parse_file(f, options)
+                mips_file = parse_file_cached(filename, options)
             all_functions.update((fn.name, fn) for fn in mips_file.functions)
             mips_file.asm_data.merge_into(asm_data)
 
@@ -67,8 +153,9 @@ def run(options: Options) -> int:
         dump_typemap(typemap)
         return 0
 
+    all_functions_list = list(all_functions.values())
     if not options.function_indexes_or_names:
-        functions = list(all_functions.values())
+        functions = all_functions_list
     else:
         functions = []
         for index_or_name in options.function_indexes_or_names:
@@ -80,7 +167,7 @@ def run(options: Options) -> int:
                         file=sys.stderr,
                     )
                     return 1
-                functions.append(list(all_functions.values())[index_or_name])
+                functions.append(all_functions_list[index_or_name])
             else:
                 if index_or_name not in all_functions:
                     print(f"Function {index_or_name} not found.", file=sys.stderr)
@@ -90,6 +177,10 @@ def run(options: Options) -> int:
     function_names = set(all_functions.keys())
     global_info = GlobalInfo(asm_data, function_names, typemap)
     function_infos: List[Union[FunctionInfo, Exception]] = []
+    # Functions are translated in order, in this process: they share
+    # global_info, whose global symbols and their (unified) types are built up
+    # across all functions and feed into both later functions and the global
+    # declarations, so they can't be farmed out to separate processes.
     for function in functions:
         try:
             info = translate_to_ast(function, options, global_info)
@@ -1,17 +1,36 @@
 from dataclasses import dataclass, field
 import re
 import struct
+import sys
 import typing
 from pathlib import Path
-from typing import Callable, Dict, List, Match, Optional, Set, Tuple, TypeVar, Union
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Match,
+    Optional,
+    Pattern,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 from .error import DecompFailure
 from .options import Options
-from .parse_instruction import Instruction, InstructionMeta, parse_instruction
+from .parse_instruction import (
+    FrozenSlots,
+    Instruction,
+    InstructionMeta,
+    parse_instruction,
+)
 
 
 @dataclass(frozen=True)
-class Label:
+class Label(FrozenSlots):
+    __slots__ = ("name",)
+
     name: str
 
     def __str__(self) -> str:
@@ -24,7 +43,7 @@ class Function:
     body: List[Union[Instruction, Label]] = field(default_factory=list)
 
     def new_label(self, name: str) -> None:
-        label = Label(name)
+        label = Label(sys.intern(name))
         if self.body and self.body[-1] == label:
             # Skip repeated labels
             return
@@ -96,7 +115,7 @@ class MIPSFile:
     current_data: AsmDataEntry = field(default_factory=AsmDataEntry)
 
     def new_function(self, name: str) -> None:
-        self.current_function = Function(name=name)
+        self.current_function = Function(name=sys.intern(name))
         self.functions.append(self.current_function)
 
     def new_instruction(self, instruction: Instruction) -> None:
@@ -203,28 +222,42 @@ def parse_ascii_directive(line: str, z: bool) -> bytes:
     return b"".join(ret)
 
 
-def parse_file(f: typing.TextIO, options: Options) -> MIPSFile:
-    filename = Path(f.name).name
+COMMENT_OR_STRING_RE: Pattern[str] = re.compile(r'#.*|/\*.*?\*/|"(?:\\.|[^\\"])*"')
+WHITESPACE_OR_STRING_RE: Pattern[str] = re.compile(r'\s+|"(?:\\.|[^\\"])*"')
+LOCAL_GLABEL_RE: Pattern[str] = re.compile("L(_U_)?[0-9A-F]{8}")
+LOCAL_LABEL_RE: Pattern[str] = re.compile("loc_|locret_|def_")
+LABEL_RE: Pattern[str] = re.compile(r"([a-zA-Z0-9_.]+):")
+
+
+# https://stackoverflow.com/a/241506
+def comment_replacer(match: Match[str]) -> str:
+    s = match.group(0)
+    if s[0] in "/# \t":
+        return " "
+    else:
+        return s
+
+
+def assume_macro_unset(defines: Dict[str, int], macro_name: str) -> None:
+    defines[macro_name] = 0
+    print(
+        f"Note: assuming {macro_name} is unset for .ifdef, "
+        f"pass -D{macro_name}/-U{macro_name} to set/unset explicitly."
+    )
+
+
+def parse_file(
+    f: typing.TextIO, options: Options, *, filename: Optional[str] = None
+) -> MIPSFile:
+    """Parse an asm file. `filename` defaults to the name of `f`; it must be
+    given when `f` is not a real file (e.g. a StringIO)."""
+    filename = Path(filename or f.name).name
     mips_file: MIPSFile = MIPSFile(filename)
     defines: Dict[str, int] = options.preproc_defines
     ifdef_level: int = 0
     ifdef_levels: List[int] = []
     curr_section = ".text"
 
-    # https://stackoverflow.com/a/241506
-    def re_comment_replacer(match: Match[str]) -> str:
-        s = match.group(0)
-        if s[0] in "/# \t":
-            return " "
-        else:
-            return s
-
-    re_comment_or_string = re.compile(r'#.*|/\*.*?\*/|"(?:\\.|[^\\"])*"')
-    re_whitespace_or_string = re.compile(r'\s+|"(?:\\.|[^\\"])*"')
-    re_local_glabel = re.compile("L(_U_)?[0-9A-F]{8}")
-    re_local_label = re.compile("loc_|locret_|def_")
-    re_label = re.compile(r"([a-zA-Z0-9_.]+):")
-
     T = TypeVar("T")
 
     def try_parse(parser: Callable[[], T], directive: str) -> T:
@@ -235,43 +268,43 @@ def parse_file(f: typing.TextIO, options: Options) -> MIPSFile:
                 f"Could not parse asm_data {directive} in {curr_section}: {line}"
             )
 
+    def process_label(label: str, *, glabel: bool) -> None:
+        if curr_section == ".rodata":
+            mips_file.new_data_label(label, is_readonly=True, is_bss=False)
+        elif curr_section == ".data":
+            mips_file.new_data_label(label, is_readonly=False, is_bss=False)
+        elif curr_section == ".bss":
+            mips_file.new_data_label(label, is_readonly=False, is_bss=True)
+        elif curr_section == ".text":
+            re_local = LOCAL_GLABEL_RE if glabel else LOCAL_LABEL_RE
+            if label.startswith("."):
+                if mips_file.current_function is None:
+                    raise DecompFailure(f"Label {label} is not within a function!")
+                mips_file.new_label(label.lstrip("."))
+            elif re_local.match(label) and mips_file.current_function is not None:
+                # Don't treat labels as new functions if they follow a
+                # specific naming pattern. This is used for jump table
+                # targets in both IDA and old n64split output.
+                # We skip this behavior for the very first label in the
+                # file though, to avoid crashes due to unidentified
+                # functions. (Should possibly be generalized to cover any
+                # glabel that has a branch that goes across?)
+                mips_file.new_label(label)
+            else:
+                mips_file.new_function(label)
+
     for lineno, line in enumerate(f, 1):
         # Check for goto markers before stripping comments
         emit_goto = any(pattern in line for pattern in options.goto_patterns)
 
         # Strip comments and whitespace (but not within strings)
-        line = re.sub(re_comment_or_string, re_comment_replacer, line)
-        line = re.sub(re_whitespace_or_string, re_comment_replacer, line)
+        line = COMMENT_OR_STRING_RE.sub(comment_replacer, line)
+        line = WHITESPACE_OR_STRING_RE.sub(comment_replacer, line)
         line = line.strip()
 
-        def process_label(label: str, *, glabel: bool) -> None:
-            if curr_section == ".rodata":
-                mips_file.new_data_label(label, is_readonly=True, is_bss=False)
-            elif curr_section == ".data":
-                mips_file.new_data_label(label, is_readonly=False, is_bss=False)
-            elif curr_section == ".bss":
-                mips_file.new_data_label(label, is_readonly=False, is_bss=True)
-            elif curr_section == ".text":
-                re_local = re_local_glabel if glabel else re_local_label
-                if label.startswith("."):
-                    if mips_file.current_function is None:
-                        raise DecompFailure(f"Label {label} is not within a function!")
-                    mips_file.new_label(label.lstrip("."))
-                elif re_local.match(label) and mips_file.current_function is not None:
-                    # Don't treat labels as new functions if they follow a
-                    # specific naming pattern. This is used for jump table
-                    # targets in both IDA and old n64split output.
-                    # We skip this behavior for the very first label in the
-                    # file though, to avoid crashes due to unidentified
-                    # functions. (Should possibly be generalized to cover any
-                    # glabel that has a branch that goes across?)
-                    mips_file.new_label(label)
-                else:
-                    mips_file.new_function(label)
-
         # Check for labels
         while True:
-            g = re_label.match(line)
+            g = LABEL_RE.match(line)
             if not g:
                 break
 
@@ -284,16 +317,12 @@ def parse_file(f: typing.TextIO, options: Options) -> MIPSFile:
         if not line:
             continue
 
-        if line.startswith("."):
+        if line[0] == ".":
             # Assembler directive.
             if line.startswith(".ifdef") or line.startswith(".ifndef"):
                 macro_name = line.split()[1]
                 if macro_name not in defines:
-                    defines[macro_name] = 0
-                    print(
-                        f"Note: assuming {macro_name} is unset for .ifdef, "
-                        f"pass -D{macro_name}/-U{macro_name} to set/unset explicitly."
-                    )
+                    assume_macro_unset(defines, macro_name)
                 level = defines[macro_name]
                 if line.startswith(".ifdef"):
                     level = 1 - level
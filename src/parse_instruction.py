@@ -1,8 +1,10 @@
 """Functions and classes useful for parsing an arbitrary MIPS instruction.
 """
-from dataclasses import dataclass, replace
-import string
-from typing import List, Optional, Set, Union
+from dataclasses import dataclass, fields, replace
+import functools
+import re
+import sys
+from typing import Any, ClassVar, Dict, List, Optional, Pattern, Set, Tuple, Union
 
 from .error import DecompFailure
 
@@ -73,28 +75,103 @@ DIV_MULT_INSTRUCTIONS: Set[str] = {
     "dmultu",
 }
 
+BRANCH_LIKELY_INSTRUCTIONS: Set[str] = {
+    "beql",
+    "bnel",
+    "beqzl",
+    "bnezl",
+    "bgezl",
+    "bgtzl",
+    "blezl",
+    "bltzl",
+    "bc1tl",
+    "bc1fl",
+}
+
+BRANCH_INSTRUCTIONS: Set[str] = {
+    "j",
+    "b",
+    "beq",
+    "bne",
+    "beqz",
+    "bnez",
+    "bgez",
+    "bgtz",
+    "blez",
+    "bltz",
+    "bc1t",
+    "bc1f",
+} | BRANCH_LIKELY_INSTRUCTIONS
+
+# (we don't treat jal/jalr as jumps, since control flow will return after the call)
+JUMP_INSTRUCTIONS: Set[str] = BRANCH_INSTRUCTIONS | {"jr"}
+
+DELAY_SLOT_INSTRUCTIONS: Set[str] = BRANCH_INSTRUCTIONS | {"jr", "jal", "jalr"}
+
+
+class FrozenSlots:
+    """Base class for frozen dataclasses that define __slots__.
+
+    Unpickling or copying a slotted object normally assigns its attributes one
+    by one, which frozen dataclasses forbid, so reconstruct instances through
+    their constructor instead."""
+
+    __slots__ = ()
+    __dataclass_fields__: ClassVar[Dict[str, Any]]
+
+    def __reduce__(self) -> Tuple[Any, Tuple[object, ...]]:
+        values = tuple(getattr(self, f.name) for f in fields(self))
+        return (type(self), values)
+
 
 @dataclass(frozen=True)
-class Register:
+class Register(FrozenSlots):
+    __slots__ = ("register_name",)
+
     register_name: str
 
+    @staticmethod
+    def get(name: str) -> "Register":
+        """Return the canonical Register with the given name. Interning
+        registers lets dict lookups keyed on them succeed on an identity
+        check instead of a field-by-field comparison."""
+        reg = INTERNED_REGISTERS.get(name)
+        if reg is None:
+            reg = Register(name)
+            INTERNED_REGISTERS[name] = reg
+        return reg
+
     def is_float(self) -> bool:
         name = self.register_name
         return bool(name) and name[0] == "f" and name != "fp"
 
+    def __reduce__(self) -> Tuple[Any, Tuple[object, ...]]:
+        # Unpickled and deep-copied registers should be the interned ones too.
+        return (Register.get, (self.register_name,))
+
+    def __hash__(self) -> int:
+        # Registers are used as dict keys all over; hashing the name directly
+        # (whose hash CPython caches) avoids building a tuple per lookup.
+        return hash(self.register_name)
+
     def other_f64_reg(self) -> "Register":
         assert (
             self.is_float()
         ), "tried to get complement reg of non-floating point register"
         num = int(self.register_name[1:])
-        return Register(f"f{num ^ 1}")
+        return Register.get(f"f{num ^ 1}")
 
     def __str__(self) -> str:
         return f"${self.register_name}"
 
 
+INTERNED_REGISTERS: Dict[str, Register] = {}
+
+
 @dataclass(frozen=True)
-class AsmGlobalSymbol:
+class AsmGlobalSymbol(FrozenSlots):
+    __slots__ = ("symbol_name",)
+
     symbol_name: str
 
     def __str__(self) -> str:
@@ -103,6 +180,8 @@ class AsmGlobalSymbol:
 
 @dataclass(frozen=True)
 class AsmSectionGlobalSymbol(AsmGlobalSymbol):
+    __slots__ = ("section_name", "addend")
+
     section_name: str
     addend: int
 
@@ -116,7 +195,9 @@ def asm_section_global_symbol(section_name: str, addend: int) -> AsmSectionGloba
 
 
 @dataclass(frozen=True)
-class Macro:
+class Macro(FrozenSlots):
+    __slots__ = ("macro_name", "argument")
+
     macro_name: str
     argument: "Argument"  # forward-declare
 
@@ -125,7 +206,9 @@ class Macro:
 
 
 @dataclass(frozen=True)
-class AsmLiteral:
+class AsmLiteral(FrozenSlots):
+    __slots__ = ("value",)
+
     value: int
 
     def signed_value(self) -> int:
@@ -136,7 +219,9 @@ class AsmLiteral:
 
 
 @dataclass(frozen=True)
-class AsmAddressMode:
+class AsmAddressMode(FrozenSlots):
+    __slots__ = ("lhs", "rhs")
+
     lhs: Union[AsmLiteral, Macro, None]
     rhs: Register
 
@@ -154,7 +239,9 @@ class AsmAddressMode:
 
 
 @dataclass(frozen=True)
-class BinOp:
+class BinOp(FrozenSlots):
+    __slots__ = ("op", "lhs", "rhs")
+
     op: str
     lhs: "Argument"
     rhs: "Argument"
@@ -164,7 +251,9 @@ class BinOp:
 
 
 @dataclass(frozen=True)
-class JumpTarget:
+class JumpTarget(FrozenSlots):
+    __slots__ = ("target",)
+
     target: str
 
     def __str__(self) -> str:
@@ -175,19 +264,20 @@ Argument = Union[
     Register, AsmGlobalSymbol, AsmAddressMode, Macro, AsmLiteral, BinOp, JumpTarget
 ]
 
-valid_word = string.ascii_letters + string.digits + "_"
-valid_number = "-xX" + string.hexdigits
-
-
-def parse_word(elems: List[str], valid: str = valid_word) -> str:
-    S: str = ""
-    while elems and elems[0] in valid:
-        S += elems.pop(0)
-    return S
+# Leading whitespace is skipped as part of each token.
+ARG_TOKEN_RE: Pattern[str] = re.compile(
+    r"\s*(?:"
+    r"(?P<reg>\$[A-Za-z0-9_]*)"
+    r"|(?P<dot>\.[A-Za-z0-9_]*)"
+    r"|(?P<macro>%[A-Za-z0-9_]*)"
+    r"|(?P<number>[0-9][0-9A-Fa-fxX-]*)"
+    r"|(?P<word>[A-Za-z_][A-Za-z0-9_]*)"
+    r"|(?P<op>>>|.)"
+    r")"
+)
 
 
-def parse_number(elems: List[str]) -> int:
-    number_str = parse_word(elems, valid_number)
+def parse_number(number_str: str) -> int:
     if number_str[0] == "0":
         assert len(number_str) == 1 or number_str[1] in "xX"
     ret = int(number_str, 0)
@@ -215,68 +305,88 @@ def constant_fold(arg: Argument) -> Argument:
     return arg
 
 
+def expect_token(arg: str, pos: int, text: str) -> int:
+    m = ARG_TOKEN_RE.match(arg, pos)
+    assert m is not None, f"Expected {text}, got end of argument"
+    got = m.group(m.lastindex or 0)
+    assert got == text, f"Expected {text}, got {got} (rest: {arg[pos:]})"
+    return m.end()
+
+
 # Main parser.
-def parse_arg_elems(arg_elems: List[str]) -> Optional[Argument]:
+def parse_arg_elems(arg: str, pos: int) -> Tuple[Optional[Argument], int]:
+    """Parse an argument from arg[pos:], stopping at an unmatched ")" or at
+    the end of the string. Returns the argument and the new position.
+
+    Tokens are matched in place with ARG_TOKEN_RE, so no token list or
+    substrings beyond the token texts themselves are built."""
     value: Optional[Argument] = None
 
-    def expect(n: str) -> str:
-        g = arg_elems.pop(0)
-        assert g in n, f"Expected one of {list(n)}, got {g} (rest: {arg_elems})"
-        return g
-
-    while arg_elems:
-        tok: str = arg_elems[0]
-        if tok.isspace():
-            # Ignore whitespace.
-            arg_elems.pop(0)
-        elif tok == "$":
+    while pos < len(arg):
+        m = ARG_TOKEN_RE.match(arg, pos)
+        if m is None:
+            # Only trailing whitespace remains.
+            break
+        kind = m.lastgroup
+        tok = m.group(m.lastindex or 0)
+        end = m.end()
+        if kind == "reg":
             # Register.
             assert value is None
-            arg_elems.pop(0)
-            reg = parse_word(arg_elems)
+            pos = end
+            reg = tok[1:]
             if reg == "s8":
                 reg = "fp"
             if reg == "r0":
                 reg = "zero"
-            value = Register(reg)
-        elif tok == ".":
+            value = Register.get(reg)
+        elif kind == "dot":
             # Either a jump target (i.e. a label), or a section reference.
             assert value is None
-            arg_elems.pop(0)
-            word = parse_word(arg_elems)
+            pos = end
+            word = tok[1:]
             if word in ["data", "rodata", "bss", "text"]:
                 value = asm_section_global_symbol(word, 0)
             else:
-                value = JumpTarget(word)
-        elif tok == "%":
+                value = JumpTarget(sys.intern(word))
+        elif kind == "macro":
             # A macro (i.e. %hi(...) or %lo(...)).
             assert value is None
-            arg_elems.pop(0)
-            macro_name = parse_word(arg_elems)
+            macro_name = tok[1:]
             assert macro_name in ("hi", "lo")
-            expect("(")
+            pos = expect_token(arg, end, "(")
             # Get the argument of the macro (which must exist).
-            m = parse_arg_elems(arg_elems)
-            assert m is not None
-            expect(")")
+            macro_arg, pos = parse_arg_elems(arg, pos)
+            assert macro_arg is not None
+            pos = expect_token(arg, pos, ")")
             # A macro may be the lhs of an AsmAddressMode, so we don't return here.
-            value = Macro(macro_name, m)
+            value = Macro(macro_name, macro_arg)
         elif tok == ")":
             # Break out to the parent of this call, since we are in parens.
             break
-        elif tok in string.digits or (tok == "-" and value is None):
-            # Try a number.
+        elif kind == "number":
+            # A number.
             assert value is None
-            value = AsmLiteral(parse_number(arg_elems))
+            pos = end
+            value = AsmLiteral(parse_number(tok))
+        elif tok == "-" and value is None:
+            # A negative number.
+            num = ARG_TOKEN_RE.match(arg, end)
+            assert (
+                num is not None
+                and num.lastgroup == "number"
+                and num.start("number") == end
+            )
+            value = AsmLiteral(parse_number(tok + num.group("number")))
+            pos = num.end()
         elif tok == "(":
             # Address mode or binary operation.
             # There was possibly an offset, so value could be a AsmLiteral or Macro.
             assert value is None or isinstance(value, (AsmLiteral, Macro))
-            expect("(")
             # Get what is being dereferenced.
-            rhs = parse_arg_elems(arg_elems)
+            rhs, pos = parse_arg_elems(arg, end)
             assert rhs is not None
-            expect(")")
+            pos = expect_token(arg, pos, ")")
             if isinstance(rhs, BinOp):
                 # Binary operation.
                 value = constant_fold(rhs)
@@ -284,22 +394,16 @@ def parse_arg_elems(arg_elems: List[str]) -> Optional[Argument]:
                 # Address mode.
                 assert isinstance(rhs, Register)
                 value = AsmAddressMode(value, rhs)
-        elif tok in valid_word:
+        elif kind == "word":
             # Global symbol.
             assert value is None
-            value = AsmGlobalSymbol(parse_word(arg_elems))
-        elif tok in ">+-&*":
+            pos = end
+            value = AsmGlobalSymbol(tok)
+        elif tok in (">>", "+", "-", "&", "*"):
             # Binary operators, used e.g. to modify global symbols or constants.
             assert isinstance(value, (AsmLiteral, AsmGlobalSymbol))
 
-            if tok == ">":
-                expect(">")
-                expect(">")
-                op = ">>"
-            else:
-                op = expect("&+-*")
-
-            rhs = parse_arg_elems(arg_elems)
+            rhs, pos = parse_arg_elems(arg, end)
             # These operators can only use constants as the right-hand-side.
             if rhs and isinstance(rhs, BinOp) and rhs.op == "*":
                 rhs = constant_fold(rhs)
@@ -309,23 +413,31 @@ def parse_arg_elems(arg_elems: List[str]) -> Optional[Argument]:
                 )
             assert isinstance(rhs, AsmLiteral)
             if isinstance(value, AsmSectionGlobalSymbol):
-                return asm_section_global_symbol(
-                    value.section_name, value.addend + rhs.value
+                return (
+                    asm_section_global_symbol(
+                        value.section_name, value.addend + rhs.value
+                    ),
+                    pos,
                 )
-            return BinOp(op, value, rhs)
+            return BinOp(tok, value, rhs), pos
         else:
-            assert False, f"Unknown token {tok} in {arg_elems}"
+            assert False, f"Unknown token {tok} in {arg[pos:]}"
 
-    return value
+    return value, pos
 
 
+# Arguments are immutable, so the same operand text (e.g. "0x18($sp)", which
+# recurs constantly in real asm) can share a single parsed object.
+@functools.lru_cache(maxsize=4096)
 def parse_arg(arg: str) -> Optional[Argument]:
-    arg_elems: List[str] = list(arg)
-    return parse_arg_elems(arg_elems)
+    value, _ = parse_arg_elems(arg.strip(), 0)
+    return value
 
 
 @dataclass(frozen=True)
-class InstructionMeta:
+class InstructionMeta(FrozenSlots):
+    __slots__ = ("emit_goto", "filename", "lineno", "synthetic")
+
     emit_goto: bool
     filename: str
     lineno: int
@@ -343,7 +455,10 @@ class InstructionMeta:
 
 
 @dataclass(frozen=True)
-class Instruction:
+class Instruction(FrozenSlots):
+    # str_cache is not a field; it holds the lazily computed __str__ result.
+    __slots__ = ("mnemonic", "args", "meta", "str_cache")
+
     mnemonic: str
     args: List[Argument]
     meta: InstructionMeta
@@ -355,38 +470,10 @@ class Instruction:
         return Instruction(mnemonic, args, replace(old.meta, synthetic=True))
 
     def is_branch_instruction(self) -> bool:
-        return (
-            self.mnemonic
-            in [
-                "j",
-                "b",
-                "beq",
-                "bne",
-                "beqz",
-                "bnez",
-                "bgez",
-                "bgtz",
-                "blez",
-                "bltz",
-                "bc1t",
-                "bc1f",
-            ]
-            or self.is_branch_likely_instruction()
-        )
+        return self.mnemonic in BRANCH_INSTRUCTIONS
 
     def is_branch_likely_instruction(self) -> bool:
-        return self.mnemonic in [
-            "beql",
-            "bnel",
-            "beqzl",
-            "bnezl",
-            "bgezl",
-            "bgtzl",
-            "blezl",
-            "bltzl",
-            "bc1tl",
-            "bc1fl",
-        ]
+        return self.mnemonic in BRANCH_LIKELY_INSTRUCTIONS
 
     def get_branch_target(self) -> JumpTarget:
         label = self.args[-1]
@@ -399,66 +486,63 @@ class Instruction:
         return label
 
     def is_jump_instruction(self) -> bool:
-        # (we don't treat jal/jalr as jumps, since control flow will return
-        # after the call)
-        return self.is_branch_instruction() or self.mnemonic == "jr"
+        return self.mnemonic in JUMP_INSTRUCTIONS
 
     def is_delay_slot_instruction(self) -> bool:
-        return self.is_branch_instruction() or self.mnemonic in [
-            "jr",
-            "jal",
-            "jalr",
-        ]
+        return self.mnemonic in DELAY_SLOT_INSTRUCTIONS
 
     def __str__(self) -> str:
-        args = ", ".join(str(arg) for arg in self.args)
-        return f"{self.mnemonic} {args}"
+        ret: Optional[str] = getattr(self, "str_cache", None)
+        if ret is None:
+            args = ", ".join(str(arg) for arg in self.args)
+            ret = f"{self.mnemonic} {args}"
+            object.__setattr__(self, "str_cache", ret)
+        return ret
 
 
 def normalize_instruction(instr: Instruction) -> Instruction:
     args = instr.args
+    zero = Register.get("zero")
     if len(args) == 3:
-        if instr.mnemonic == "sll" and args[0] == args[1] == Register("zero"):
+        if instr.mnemonic == "sll" and args[0] == args[1] == zero:
             return Instruction("nop", [], instr.meta)
-        if instr.mnemonic == "or" and args[2] == Register("zero"):
+        if instr.mnemonic == "or" and args[2] == zero:
             return Instruction("move", args[:2], instr.meta)
-        if instr.mnemonic == "addu" and args[2] == Register("zero"):
+        if instr.mnemonic == "addu" and args[2] == zero:
             return Instruction("move", args[:2], instr.meta)
-        if instr.mnemonic == "daddu" and args[2] == Register("zero"):
+        if instr.mnemonic == "daddu" and args[2] == zero:
             return Instruction("move", args[:2], instr.meta)
-        if instr.mnemonic == "nor" and args[1] == Register("zero"):
+        if instr.mnemonic == "nor" and args[1] == zero:
             return Instruction("not", [args[0], args[2]], instr.meta)
-        if instr.mnemonic == "nor" and args[2] == Register("zero"):
+        if instr.mnemonic == "nor" and args[2] == zero:
             return Instruction("not", [args[0], args[1]], instr.meta)
         if instr.mnemonic == "addiu" and args[2] == AsmLiteral(0):
             return Instruction("move", args[:2], instr.meta)
         if instr.mnemonic in DIV_MULT_INSTRUCTIONS:
-            if args[0] != Register("zero"):
+            if args[0] != zero:
                 raise DecompFailure("first argument to div/mult must be $zero")
             return Instruction(instr.mnemonic, args[1:], instr.meta)
         if (
             instr.mnemonic == "ori"
-            and args[1] == Register("zero")
+            and args[1] == zero
             and isinstance(args[2], AsmLiteral)
         ):
             lit = AsmLiteral(args[2].value & 0xFFFF)
             return Instruction("li", [args[0], lit], instr.meta)
         if (
             instr.mnemonic == "addiu"
-            and args[1] == Register("zero")
+            and args[1] == zero
             and isinstance(args[2], AsmLiteral)
         ):
             lit = AsmLiteral(((args[2].value + 0x8000) & 0xFFFF) - 0x8000)
             return Instruction("li", [args[0], lit], instr.meta)
-        if instr.mnemonic == "beq" and args[0] == args[1] == Register("zero"):
+        if instr.mnemonic == "beq" and args[0] == args[1] == zero:
             return Instruction("b", [args[2]], instr.meta)
-        if instr.mnemonic in ["bne", "beq", "beql", "bnel"] and args[1] == Register(
-            "zero"
-        ):
+        if instr.mnemonic in ["bne", "beq", "beql", "bnel"] and args[1] == zero:
             mn = instr.mnemonic[:3] + "z" + instr.mnemonic[3:]
             return Instruction(mn, [args[0], args[2]], instr.meta)
     if len(args) == 2:
-        if instr.mnemonic == "beqz" and args[0] == Register("zero"):
+        if instr.mnemonic == "beqz" and args[0] == zero:
             return Instruction("b", [args[1]], instr.meta)
         if instr.mnemonic == "lui" and isinstance(args[1], AsmLiteral):
             lit = AsmLiteral((args[1].value & 0xFFFF) << 16)
@@ -480,12 +564,15 @@ def parse_instruction(line: str, meta: InstructionMeta) -> Instruction:
         # First token is instruction name, rest is args.
         line = line.strip()
         mnemonic, _, args_str = line.partition(" ")
+        # Interned, so that lookups in the mnemonic tables compare by identity.
+        mnemonic = sys.intern(mnemonic)
         # Parse arguments.
-        args: List[Argument] = list(
-            filter(
-                None, [parse_arg(arg_str.strip()) for arg_str in args_str.split(",")]
-            )
-        )
+        args: List[Argument] = []
+        if args_str:
+            for arg_str in args_str.split(","):
+                arg = parse_arg(arg_str)
+                if arg is not None:
+                    args.append(arg)
         instr = Instruction(mnemonic, args, meta)
         return normalize_instruction(instr)
     except Exception as e:
@@ -3,7 +3,6 @@ from dataclasses import dataclass, field, replace
 import math
 import struct
 import sys
-import traceback
 from contextlib import contextmanager
 import typing
 from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
@@ -27,6 +26,7 @@ from .parse_instruction import (
     AsmGlobalSymbol,
     AsmLiteral,
     BinOp,
+    FrozenSlots,
     Instruction,
     Macro,
     Register,
@@ -45,7 +45,7 @@ ASSOCIATIVE_OPS: Set[str] = {"+", "&&", "||", "&", "|", "^", "*"}
 COMPOUND_ASSIGNMENT_OPS: Set[str] = {"+", "-", "*", "/", "%", "&", "|", "^", "<<", ">>"}
 
 ARGUMENT_REGS: List[Register] = list(
-    map(Register, ["a0", "a1", "a2", "a3", "f12", "f14"])
+    map(Register.get, ["a0", "a1", "a2", "a3", "f12", "f14"])
 )
 
 SIMPLE_TEMP_REGS: List[Register] = list(
@@ -443,7 +443,12 @@ def get_stack_info(
         # Iterate over the whole function, not just the first basic block,
         # to estimate the boundary for the subroutine argument region
         info.subroutine_arg_top = info.allocated_stack_size
+        scanned_blocks: Set[int] = set()
         for node in flow_graph.nodes:
+            # Duplicated return nodes are copies of the same block; scan it once
+            if node.block.index in scanned_blocks:
+                continue
+            scanned_blocks.add(node.block.index)
             for inst in node.block.instructions:
                 if not inst.args or not isinstance(inst.args[0], Register):
                     continue
@@ -461,7 +466,7 @@ def get_stack_info(
                 elif (
                     inst.mnemonic == "addiu"
                     and destination.register_name != "sp"
-                    and inst.args[1] == Register("sp")
+                    and inst.args[1] == Register.get("sp")
                     and isinstance(inst.args[2], AsmLiteral)
                     and inst.args[2].value < info.allocated_stack_size
                 ):
@@ -1430,7 +1435,9 @@ class CommentStmt(Statement):
 
 
 @dataclass(frozen=True)
-class AddressMode:
+class AddressMode(FrozenSlots):
+    __slots__ = ("offset", "rhs")
+
     offset: int
     rhs: Register
 
@@ -1442,7 +1449,9 @@ class AddressMode:
 
 
 @dataclass(frozen=True)
-class RawSymbolRef:
+class RawSymbolRef(FrozenSlots):
+    __slots__ = ("offset", "sym")
+
     offset: int
     sym: AsmGlobalSymbol
 
@@ -1459,7 +1468,7 @@ class RegInfo:
     stack_info: StackInfo = field(repr=False)
 
     def __getitem__(self, key: Register) -> Expression:
-        if key == Register("zero"):
+        if key.register_name == "zero":
             return Literal(0)
         ret = self.get_raw(key)
         if ret is None:
@@ -1485,11 +1494,11 @@ class RegInfo:
         return key in self.contents
 
     def __setitem__(self, key: Register, value: Expression) -> None:
-        assert key != Register("zero")
+        assert key.register_name != "zero"
         self.contents[key] = value
 
     def __delitem__(self, key: Register) -> None:
-        assert key != Register("zero")
+        assert key.register_name != "zero"
         del self.contents[key]
 
     def get_raw(self, key: Register) -> Optional[Expression]:
@@ -1571,7 +1580,7 @@ class InstrArgs:
                 "Tried to use a double-precision instruction with odd-numbered float "
                 f"register {reg}"
             )
-        other = self.regs[Register(f"f{reg_num+1}")]
+        other = self.regs[Register.get(f"f{reg_num+1}")]
         if not isinstance(other, Literal) or other.type.get_size_bits() == 64:
             raise DecompFailure(
                 f"Unable to determine a value for double-precision register {reg} "
@@ -2010,7 +2019,7 @@ def handle_ori(args: InstrArgs) -> Expression:
 
 def handle_sltu(args: InstrArgs) -> Expression:
     right = args.reg(2)
-    if args.reg_ref(1) == Register("zero"):
+    if args.reg_ref(1) == Register.get("zero"):
         # (0U < x) is equivalent to (x != 0)
         uw_right = early_unwrap(right)
         if isinstance(uw_right, BinaryOp) and uw_right.op == "^":
@@ -2521,6 +2530,10 @@ def handle_bgez(args: InstrArgs) -> Condition:
     return BinaryOp.scmp(expr, ">=", Literal(0))
 
 
+# %lo(...) is replaced by zero; the literal is immutable and can be shared.
+STRIPPED_LO_MACRO = AsmLiteral(0)
+
+
 def strip_macros(arg: Argument) -> Argument:
     """Replace %lo(...) by 0, and assert that there are no %hi(...). We assume that
     %hi's only ever occur in lui, where we expand them to an entire value, and not
@@ -2531,7 +2544,7 @@ def strip_macros(arg: Argument) -> Argument:
             raise DecompFailure("%hi macro outside of lui")
         if arg.macro_name != "lo":
             raise DecompFailure(f"Unrecognized linker macro %{arg.macro_name}")
-        return AsmLiteral(0)
+        return STRIPPED_LO_MACRO
     elif isinstance(arg, AsmAddressMode) and isinstance(arg.lhs, Macro):
         if arg.lhs.macro_name != "lo":
             raise DecompFailure(
@@ -2559,7 +2572,9 @@ def function_abi(
     arguments may be passed on the stack; we could compute the offset at which that
     would start but right now don't care -- we just slurp up everything.)"""
     if not fn_sig.params_known:
-        return [], [Register(r) for r in ["f12", "f13", "f14", "a0", "a1", "a2", "a3"]]
+        return [], [
+            Register.get(r) for r in ["f12", "f13", "f14", "a0", "a1", "a2", "a3"]
+        ]
 
     offset = 0
     only_floats = True
@@ -2571,7 +2586,7 @@ def function_abi(
         slots.append(
             AbiStackSlot(
                 offset=0,
-                reg=Register("a0"),
+                reg=Register.get("a0"),
                 name="__return__",
                 type=Type.ptr(fn_sig.return_type),
             )
@@ -2587,14 +2602,14 @@ def function_abi(
         name = param.name
         reg2: Optional[Register]
         if ind < 2 and only_floats:
-            reg = Register("f12" if ind == 0 else "f14")
+            reg = Register.get("f12" if ind == 0 else "f14")
             is_double = param.type.is_float() and param.type.get_size_bits() == 64
             slots.append(
                 AbiStackSlot(offset=offset, reg=reg, name=name, type=param.type)
             )
             if is_double and not for_call:
                 name2 = f"{name}_lo" if name else None
-                reg2 = Register("f13" if ind == 0 else "f15")
+                reg2 = Register.get("f13" if ind == 0 else "f15")
                 slots.append(
                     AbiStackSlot(
                         offset=offset + 4, reg=reg2, name=name2, type=Type.any_reg()
@@ -2604,7 +2619,7 @@ def function_abi(
             for i in range(offset // 4, (offset + size) // 4):
                 unk_offset = 4 * i - offset
                 name2 = f"{name}_unk{unk_offset:X}" if name and unk_offset else name
-                reg2 = Register(f"a{i}") if i < 4 else None
+                reg2 = Register.get(f"a{i}") if i < 4 else None
                 slots.append(
                     AbiStackSlot(offset=4 * i, reg=reg2, name=name2, type=param.type)
                 )
@@ -2612,7 +2627,7 @@ def function_abi(
 
     if fn_sig.is_variadic:
         for i in range(offset // 4, 4):
-            possible.append(Register(f"a{i}"))
+            possible.append(Register.get(f"a{i}"))
 
     return slots, possible
 
@@ -2831,8 +2846,8 @@ CASES_DESTINATION_FIRST: InstrMap = {
         UnaryOp(op="-", expr=as_s64(a.reg(1)), type=Type.s64())
     ),
     # Hi/lo register uses (used after division/multiplication)
-    "mfhi": lambda a: a.regs[Register("hi")],
-    "mflo": lambda a: a.regs[Register("lo")],
+    "mfhi": lambda a: a.regs[Register.get("hi")],
+    "mflo": lambda a: a.regs[Register.get("lo")],
     # Floating point arithmetic
     "add.s": lambda a: handle_add_float(a),
     "sub.s": lambda a: BinaryOp.f32(a.reg(1), "-", a.reg(2)),
@@ -2947,6 +2962,38 @@ CASES_LWR: LwrInstrMap = {
     "lwr": lambda a, old_value: handle_lwr(a, old_value),
 }
 
+# Map from mnemonic to the CASES_* table that handles it, so that finding an
+# instruction's category is a single lookup rather than a chain of membership
+# tests. (The tables are disjoint.)
+INSTR_CATEGORIES: Dict[str, str] = {
+    mnemonic: category
+    for category, cases in [
+        ("ignore", CASES_IGNORE),
+        ("store", CASES_STORE),
+        ("source_first", CASES_SOURCE_FIRST),
+        ("branch", CASES_BRANCHES),
+        ("float_branch", CASES_FLOAT_BRANCHES),
+        ("jump", CASES_JUMPS),
+        ("fn_call", CASES_FN_CALL),
+        ("float_comp", CASES_FLOAT_COMP),
+        ("hi_lo", CASES_HI_LO),
+        ("no_dest", CASES_NO_DEST),
+        ("destination_first", CASES_DESTINATION_FIRST),
+        ("lwr", CASES_LWR),
+    ]
+    for mnemonic in cases
+}
+
+# Categories of instructions that never write a register.
+NO_OUTPUT_CATEGORIES: Set[Optional[str]] = {
+    "ignore",
+    "store",
+    "branch",
+    "float_branch",
+    "jump",
+    "no_dest",
+}
+
 
 def output_regs_for_instr(
     instr: Instruction, typemap: Optional[TypeMap]
@@ -2958,18 +3005,12 @@ def output_regs_for_instr(
             return []
         ret = [reg]
         if reg.register_name in ["f0", "v0"]:
-            ret.append(Register("return"))
+            ret.append(Register.get("return"))
         return ret
 
     mnemonic = instr.mnemonic
-    if (
-        mnemonic in CASES_JUMPS
-        or mnemonic in CASES_STORE
-        or mnemonic in CASES_BRANCHES
-        or mnemonic in CASES_FLOAT_BRANCHES
-        or mnemonic in CASES_IGNORE
-        or mnemonic in CASES_NO_DEST
-    ):
+    category = INSTR_CATEGORIES.get(mnemonic)
+    if category in NO_OUTPUT_CATEGORIES:
         return []
     if mnemonic == "jal" and typemap:
         fn_target = instr.args[0]
@@ -2977,47 +3018,70 @@ def output_regs_for_instr(
             c_fn = typemap.functions.get(fn_target.symbol_name)
             if c_fn and c_fn.ret_type is None:
                 return []
-    if mnemonic in CASES_FN_CALL:
-        return list(map(Register, ["return", "f0", "v0", "v1"]))
-    if mnemonic in CASES_SOURCE_FIRST:
+    if category == "fn_call":
+        return list(map(Register.get, ["return", "f0", "v0", "v1"]))
+    if category == "source_first":
         return reg_at(1)
-    if mnemonic in CASES_DESTINATION_FIRST:
-        return reg_at(0)
-    if mnemonic in CASES_LWR:
+    if category == "destination_first" or category == "lwr":
         return reg_at(0)
-    if mnemonic in CASES_FLOAT_COMP:
-        return [Register("condition_bit")]
-    if mnemonic in CASES_HI_LO:
-        return [Register("hi"), Register("lo")]
+    if category == "float_comp":
+        return [Register.get("condition_bit")]
+    if category == "hi_lo":
+        return [Register.get("hi"), Register.get("lo")]
     if instr.args and isinstance(instr.args[0], Register):
         return reg_at(0)
     return []
 
 
+ClobberCache = Dict[Node, Dict[Register, bool]]
+
+
+def block_clobbers(
+    node: Node, typemap: Optional[TypeMap], cache: ClobberCache
+) -> Dict[Register, bool]:
+    """Find the registers written to by a node's block. Each is mapped to True
+    if the last write to it is a function call clobbering it, and to False if
+    it is an instruction that sets it. The result is memoized in `cache`, since
+    the phi computations below rescan the same blocks many times."""
+    ret = cache.get(node)
+    if ret is None:
+        ret = {}
+        for instr in node.block.instructions:
+            with current_instr(instr):
+                if instr.mnemonic in CASES_FN_CALL:
+                    for reg in TEMP_REGS:
+                        ret[reg] = True
+                for reg in output_regs_for_instr(instr, typemap):
+                    ret[reg] = False
+        cache[node] = ret
+    return ret
+
+
 def regs_clobbered_until_dominator(
-    node: Node, typemap: Optional[TypeMap]
+    node: Node, typemap: Optional[TypeMap], cache: ClobberCache
 ) -> Set[Register]:
     if node.immediate_dominator is None:
         return set()
     seen = {node.immediate_dominator}
     stack = node.parents[:]
-    clobbered = set()
+    clobbered: Set[Register] = set()
     while stack:
         n = stack.pop()
         if n in seen:
             continue
         seen.add(n)
-        for instr in n.block.instructions:
-            with current_instr(instr):
-                clobbered.update(output_regs_for_instr(instr, typemap))
-                if instr.mnemonic in CASES_FN_CALL:
-                    clobbered.update(TEMP_REGS)
+        clobbered.update(block_clobbers(n, typemap, cache))
         stack.extend(n.parents)
     return clobbered
 
 
 def reg_always_set(
-    node: Node, reg: Register, typemap: Optional[TypeMap], *, dom_set: bool
+    node: Node,
+    reg: Register,
+    typemap: Optional[TypeMap],
+    cache: ClobberCache,
+    *,
+    dom_set: bool,
 ) -> bool:
     if node.immediate_dominator is None:
         return False
@@ -3030,13 +3094,7 @@ def reg_always_set(
         if n in seen:
             continue
         seen.add(n)
-        clobbered: Optional[bool] = None
-        for instr in n.block.instructions:
-            with current_instr(instr):
-                if instr.mnemonic in CASES_FN_CALL and reg in TEMP_REGS:
-                    clobbered = True
-                if reg in output_regs_for_instr(instr, typemap):
-                    clobbered = False
+        clobbered = block_clobbers(n, typemap, cache).get(reg)
         if clobbered == True:
             return False
         if clobbered is None:
@@ -3101,12 +3159,13 @@ def assign_phis(used_phis: List[PhiExpr], stack_info: StackInfo) -> None:
 
 def compute_has_custom_return(nodes: List[Node]) -> None:
     """Propagate the "has_custom_return" property using fixed-point iteration."""
+    # The TerminalNode, which has no block info, is always last.
+    assert isinstance(nodes[-1], TerminalNode)
+    non_terminal_nodes = nodes[:-1]
     changed = True
     while changed:
         changed = False
-        for n in nodes:
-            if isinstance(n, TerminalNode):
-                continue
+        for n in non_terminal_nodes:
             block_info = n.block.block_info
             assert isinstance(block_info, BlockInfo)
             if block_info.has_custom_return or block_info.has_function_call:
@@ -3205,7 +3264,7 @@ def translate_node_body(node: Node, regs: RegInfo, stack_info: StackInfo) -> Blo
         nonlocal has_custom_return
         regs[reg] = expr
         if reg.register_name in ["f0", "v0"]:
-            regs[Register("return")] = expr
+            regs[Register.get("return")] = expr
             has_custom_return = True
 
     def set_reg(reg: Register, expr: Optional[Expression]) -> None:
@@ -3221,7 +3280,7 @@ def translate_node_body(node: Node, regs: RegInfo, stack_info: StackInfo) -> Blo
                 and (
                     stack_info.callee_save_reg_locations.get(reg) == expr.value
                     or (
-                        reg == Register("ra")
+                        reg == Register.get("ra")
                         and stack_info.return_addr_location == expr.value
                     )
                 )
@@ -3245,7 +3304,7 @@ def translate_node_body(node: Node, regs: RegInfo, stack_info: StackInfo) -> Blo
                 prefix=reg.register_name,
             )
 
-        if reg == Register("zero"):
+        if reg.register_name == "zero":
             # Emit the expression as is. It's probably a volatile load.
             expr.use()
             to_write.append(ExprStmt(expr))
@@ -3268,14 +3327,14 @@ def translate_node_body(node: Node, regs: RegInfo, stack_info: StackInfo) -> Blo
 
     def overwrite_reg(reg: Register, expr: Expression) -> None:
         prev = regs.get_raw(reg)
-        at = regs.get_raw(Register("at"))
+        at = regs.get_raw(Register.get("at"))
         if isinstance(prev, ForceVarExpr):
             prev = prev.wrapped_expr
         if (
             not isinstance(prev, EvalOnceExpr)
             or isinstance(expr, Literal)
-            or reg == Register("sp")
-            or reg == Register("at")
+            or reg.register_name == "sp"
+            or reg.register_name == "at"
             or not prev.type.unify(expr.type)
             or (at is not None and uses_expr(at, lambda e2: e2 == prev))
         ):
@@ -3307,12 +3366,13 @@ def translate_node_body(node: Node, regs: RegInfo, stack_info: StackInfo) -> Blo
 
         mnemonic = instr.mnemonic
         args = InstrArgs(instr.args, regs, stack_info)
+        category = INSTR_CATEGORIES.get(mnemonic)
 
         # Figure out what code to generate!
-        if mnemonic in CASES_IGNORE:
+        if category == "ignore":
             pass
 
-        elif mnemonic in CASES_STORE:
+        elif category == "store":
             # Store a value in a permanent place.
             to_store = CASES_STORE[mnemonic](args)
             if to_store is None:
@@ -3354,17 +3414,17 @@ def translate_node_body(node: Node, regs: RegInfo, stack_info: StackInfo) -> Blo
                 prevent_later_function_calls()
                 to_write.append(to_store)
 
-        elif mnemonic in CASES_SOURCE_FIRST:
+        elif category == "source_first":
             # Just 'mtc1'. It's reversed, so we have to specially handle it.
             set_reg(args.reg_ref(1), CASES_SOURCE_FIRST[mnemonic](args))
 
-        elif mnemonic in CASES_BRANCHES:
+        elif category == "branch":
             assert branch_condition is None
             branch_condition = CASES_BRANCHES[mnemonic](args)
 
-        elif mnemonic in CASES_FLOAT_BRANCHES:
+        elif category == "float_branch":
             assert branch_condition is None
-            cond_bit = regs[Register("condition_bit")]
+            cond_bit = regs[Register.get("condition_bit")]
             if not isinstance(cond_bit, BinaryOp):
                 cond_bit = ExprCondition(cond_bit, type=cond_bit.type)
             if mnemonic == "bc1t":
@@ -3372,9 +3432,9 @@ def translate_node_body(node: Node, regs: RegInfo, stack_info: StackInfo) -> Blo
             elif mnemonic == "bc1f":
                 branch_condition = cond_bit.negated()
 
-        elif mnemonic in CASES_JUMPS:
+        elif category == "jump":
             assert mnemonic == "jr"
-            if args.reg_ref(0) == Register("ra"):
+            if args.reg_ref(0) == Register.get("ra"):
                 # Return from the function.
                 assert isinstance(node, ReturnNode)
             else:
@@ -3382,7 +3442,7 @@ def translate_node_body(node: Node, regs: RegInfo, stack_info: StackInfo) -> Blo
                 assert isinstance(node, SwitchNode)
                 switch_value = args.reg(0)
 
-        elif mnemonic in CASES_FN_CALL:
+        elif category == "fn_call":
             if mnemonic == "jal":
                 fn_target = args.imm(0)
                 if isinstance(fn_target, AddressOf) and isinstance(
@@ -3398,7 +3458,7 @@ def translate_node_body(node: Node, regs: RegInfo, stack_info: StackInfo) -> Blo
                 if args.count() == 1:
                     fn_target = args.reg(0)
                 elif args.count() == 2:
-                    if args.reg_ref(0) != Register("ra"):
+                    if args.reg_ref(0) != Register.get("ra"):
                         raise DecompFailure(
                             "Two-argument form of jalr is not supported."
                         )
@@ -3434,20 +3494,20 @@ def translate_node_body(node: Node, regs: RegInfo, stack_info: StackInfo) -> Blo
                     # For varargs, a subset of a0 .. a3 may be used. Don't check
                     # earlier registers for the first member of that subset.
                     pass
-                elif register == Register("f13") or register == Register("f14"):
+                elif register == Register.get("f13") or register == Register.get("f14"):
                     require = ["f12"]
-                elif register == Register("a1"):
+                elif register == Register.get("a1"):
                     require = ["a0", "f12"]
-                elif register == Register("a2"):
+                elif register == Register.get("a2"):
                     require = ["a1", "f13", "f14"]
-                elif register == Register("a3"):
+                elif register == Register.get("a3"):
                     require = ["a2"]
                 if require and not any(r in valid_extra_regs for r in require):
                     continue
 
                 valid_extra_regs.add(register.register_name)
 
-                if register == Register("f13"):
+                if register == Register.get("f13"):
                     # We don't pass in f13 or f15 because they will often only
                     # contain SecondF64Half(), and otherwise would need to be
                     # merged with f12/f14 which we don't have logic for right
@@ -3505,7 +3565,7 @@ def translate_node_body(node: Node, regs: RegInfo, stack_info: StackInfo) -> Blo
             # believe the function we're decompiling is non-void.
             # Note that this logic is duplicated in output_regs_for_instr.
             if not fn_sig.return_type.is_void():
-                regs[Register("f0")] = eval_once(
+                regs[Register.get("f0")] = eval_once(
                     Cast(
                         expr=call, reinterpret=True, silent=True, type=Type.floatish()
                     ),
@@ -3513,14 +3573,14 @@ def translate_node_body(node: Node, regs: RegInfo, stack_info: StackInfo) -> Blo
                     trivial=False,
                     prefix="f0",
                 )
-                regs[Register("f1")] = SecondF64Half()
-                regs[Register("v0")] = eval_once(
+                regs[Register.get("f1")] = SecondF64Half()
+                regs[Register.get("v0")] = eval_once(
                     Cast(expr=call, reinterpret=True, silent=True, type=Type.intptr()),
                     emit_exactly_once=False,
                     trivial=False,
                     prefix="v0",
                 )
-                regs[Register("v1")] = eval_once(
+                regs[Register.get("v1")] = eval_once(
                     as_u32(
                         Cast(expr=call, reinterpret=True, silent=False, type=Type.u64())
                     ),
@@ -3528,26 +3588,26 @@ def translate_node_body(node: Node, regs: RegInfo, stack_info: StackInfo) -> Blo
                     trivial=False,
                     prefix="v1",
                 )
-                regs[Register("return")] = call
+                regs[Register.get("return")] = call
 
             has_custom_return = False
             has_function_call = True
 
-        elif mnemonic in CASES_FLOAT_COMP:
+        elif category == "float_comp":
             expr = CASES_FLOAT_COMP[mnemonic](args)
-            regs[Register("condition_bit")] = expr
+            regs[Register.get("condition_bit")] = expr
 
-        elif mnemonic in CASES_HI_LO:
+        elif category == "hi_lo":
             hi, lo = CASES_HI_LO[mnemonic](args)
-            set_reg(Register("hi"), hi)
-            set_reg(Register("lo"), lo)
+            set_reg(Register.get("hi"), hi)
+            set_reg(Register.get("lo"), lo)
 
-        elif mnemonic in CASES_NO_DEST:
+        elif category == "no_dest":
             expr = CASES_NO_DEST[mnemonic](args)
             expr.use()
             to_write.append(ExprStmt(expr))
 
-        elif mnemonic in CASES_DESTINATION_FIRST:
+        elif category == "destination_first":
             target = args.reg_ref(0)
             val = CASES_DESTINATION_FIRST[mnemonic](args)
             if False and target in args.raw_args[1:]:
@@ -3565,7 +3625,7 @@ def translate_node_body(node: Node, regs: RegInfo, stack_info: StackInfo) -> Blo
             if (len(mn_parts) >= 2 and mn_parts[1] == "d") or mnemonic == "ldc1":
                 set_reg(target.other_f64_reg(), SecondF64Half())
 
-        elif mnemonic in CASES_LWR:
+        elif category == "lwr":
             assert mnemonic == "lwr"
             target = args.reg_ref(0)
             old_value = args.reg(0)
@@ -3582,14 +3642,20 @@ def translate_node_body(node: Node, regs: RegInfo, stack_info: StackInfo) -> Blo
                     trivial=False,
                     prefix=reg.register_name,
                 )
-                if reg != Register("zero"):
+                if reg.register_name != "zero":
                     set_reg_maybe_return(reg, expr)
             else:
                 to_write.append(ExprStmt(expr))
 
-    for instr in node.block.instructions:
-        with current_instr(instr):
+    # This is equivalent to wrapping each instruction in current_instr(), but
+    # sets up a single try block rather than a context manager per instruction.
+    instr: Optional[Instruction] = None
+    try:
+        for instr in node.block.instructions:
             process_instr(instr)
+    except Exception as e:
+        assert instr is not None
+        raise InstrProcessingFailure(instr) from e
 
     if branch_condition is not None:
         branch_condition.use()
@@ -3597,7 +3663,7 @@ def translate_node_body(node: Node, regs: RegInfo, stack_info: StackInfo) -> Blo
         switch_value.use()
     return_value: Optional[Expression] = None
     if isinstance(node, ReturnNode):
-        return_value = regs.get_raw(Register("return"))
+        return_value = regs.get_raw(Register.get("return"))
     return BlockInfo(
         to_write,
         return_value,
@@ -3616,6 +3682,9 @@ def translate_graph_from_block(
     used_phis: List[PhiExpr],
     return_blocks: List[BlockInfo],
     options: Options,
+    *,
+    clobber_cache: ClobberCache,
+    error_sites: Set[Tuple[type, str, Optional[int]]],
 ) -> None:
     """
     Given a FlowGraph node and a dictionary of register contents, give that node
@@ -3643,18 +3712,38 @@ def translate_graph_from_block(
             emsg = str(e)
             print(emsg)
         else:
+            import traceback
+
             tb = e.__traceback__
-            traceback.print_exception(None, e, tb)
+            frame = traceback.extract_tb(tb)[-1]
+            site = (type(e), frame.filename, frame.lineno)
+            if site not in error_sites:
+                # Only print the full traceback the first time each failure
+                # site is hit within a function; systemic failures can
+                # otherwise produce one per block.
+                error_sites.add(site)
+                traceback.print_exception(None, e, tb)
+            else:
+                location = traceback.format_list([frame])[0].split("\n")[0]
+                print(
+                    location,
+                    "".join(traceback.format_exception_only(type(e), e)),
+                    sep="\n",
+                    end="",
+                    file=sys.stderr,
+                )
             emsg = str(e) or traceback.format_tb(tb)[-1]
             emsg = emsg.strip().split("\n")[-1].strip()
 
         error_stmts: List[Statement] = [CommentStmt(f"Error: {emsg}")]
         if instr is not None:
+            error_stmts.append(CommentStmt(f"At instruction: {instr}"))
             print(
-                f"Error occurred while processing instruction: {instr}", file=sys.stderr
+                f"Error occurred while processing instruction: {instr}\n",
+                file=sys.stderr,
             )
-            error_stmts.append(CommentStmt(f"At instruction: {instr}"))
-        print(file=sys.stderr)
+        else:
+            print(file=sys.stderr)
         block_info = BlockInfo(
             error_stmts,
             None,
@@ -3676,9 +3765,11 @@ def translate_graph_from_block(
         if isinstance(child, TerminalNode):
             continue
         new_contents = regs.contents.copy()
-        phi_regs = regs_clobbered_until_dominator(child, typemap)
+        phi_regs = regs_clobbered_until_dominator(child, typemap, clobber_cache)
         for reg in phi_regs:
-            if reg_always_set(child, reg, typemap, dom_set=(reg in regs)):
+            if reg_always_set(
+                child, reg, typemap, clobber_cache, dom_set=(reg in regs)
+            ):
                 var = stack_info.maybe_get_register_var(reg)
                 if var is not None:
                     new_contents[reg] = var
@@ -3690,7 +3781,14 @@ def translate_graph_from_block(
                 del new_contents[reg]
         new_regs = RegInfo(contents=new_contents, stack_info=stack_info)
         translate_graph_from_block(
-            child, new_regs, stack_info, used_phis, return_blocks, options
+            child,
+            new_regs,
+            stack_info,
+            used_phis,
+            return_blocks,
+            options,
+            clobber_cache=clobber_cache,
+            error_sites=error_sites,
         )
 
 
@@ -3984,7 +4082,7 @@ def translate_to_ast(
     typemap = global_info.typemap
 
     initial_regs: Dict[Register, Expression] = {
-        Register("sp"): GlobalSymbol("sp", type=Type.ptr()),
+        Register.get("sp"): GlobalSymbol("sp", type=Type.ptr()),
         **{reg: stack_info.saved_reg_symbol(reg.register_name) for reg in SAVED_REGS},
     }
 
@@ -4017,12 +4115,12 @@ def translate_to_ast(
     else:
         initial_regs.update(
             {
-                Register("a0"): make_arg(0, Type.intptr()),
-                Register("a1"): make_arg(4, Type.any_reg()),
-                Register("a2"): make_arg(8, Type.any_reg()),
-                Register("a3"): make_arg(12, Type.any_reg()),
-                Register("f12"): make_arg(0, Type.floatish()),
-                Register("f14"): make_arg(4, Type.floatish()),
+                Register.get("a0"): make_arg(0, Type.intptr()),
+                Register.get("a1"): make_arg(4, Type.any_reg()),
+                Register.get("a2"): make_arg(8, Type.any_reg()),
+                Register.get("a3"): make_arg(12, Type.any_reg()),
+                Register.get("f12"): make_arg(0, Type.floatish()),
+                Register.get("f14"): make_arg(4, Type.floatish()),
             }
         )
 
@@ -4033,13 +4131,12 @@ def translate_to_ast(
     elif options.reg_vars == ["all"]:
         reg_vars = SAVED_REGS + SIMPLE_TEMP_REGS + ARGUMENT_REGS
     else:
-        reg_vars = list(map(Register, options.reg_vars))
+        reg_vars = list(map(Register.get, options.reg_vars))
     for reg in reg_vars:
         stack_info.add_register_var(reg)
 
     if options.debug:
-        print(stack_info)
-        print("\nNow, we attempt to translate:")
+        print(f"{stack_info}\n\nNow, we attempt to translate:")
 
     start_reg: RegInfo = RegInfo(contents=initial_regs, stack_info=stack_info)
     used_phis: List[PhiExpr] = []
@@ -4051,6 +4148,8 @@ def translate_to_ast(
         used_phis,
         return_blocks,
         options,
+        clobber_cache={},
+        error_sites=set(),
     )
 
     # A function can have a return type if all return nodes have return values.
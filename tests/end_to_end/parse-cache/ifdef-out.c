@@ -0,0 +1,6 @@
+Note: assuming VERSION_US is unset for .ifdef, pass -DVERSION_US/-UVERSION_US to set/unset explicitly.
+? test(); // static
+
+? test(void) {
+    return 2;
+}
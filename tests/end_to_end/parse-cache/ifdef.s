@@ -0,0 +1,11 @@
+.set noat      # allow manual use of $at
+.set noreorder # don't insert nops after branches
+
+glabel test
+.ifdef VERSION_US
+/* 000090 00400090 24020001 */  addiu $v0, $zero, 1
+.else
+/* 000090 00400090 24020002 */  addiu $v0, $zero, 2
+.endif
+/* 000094 00400094 03E00008 */  jr    $ra
+/* 000098 00400098 00000000 */   nop